@@ -1,7 +1,13 @@
 import os
+import json
+import threading
+import time
+from collections import OrderedDict
 import google.generativeai as genai
 from dotenv import load_dotenv
 from duckduckgo_search import DDGS
+from helpers import canonical_profile, profile_bucket
+from response_archive import open_archive_from_env
 
 # -------------------------
 # Load environment variables
@@ -14,26 +20,156 @@ if not API_KEY:
 else:
     genai.configure(api_key=API_KEY)
 
+# -------------------------
+# Response cache keyed on profile buckets
+# -------------------------
+class ResponseCache:
+    """
+    Thread-safe LRU/TTL cache shared by all sessions of a worker.
+    Concurrent requests for the same key are coalesced into a single Gemini call.
+    Error responses (and anything the caller's cacheable() rejects) are returned
+    to every waiter but never cached; an exception raised by compute() is
+    re-raised in every waiter.
+    """
+
+    def __init__(self, maxsize=512, ttl=6 * 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> [threading.Event, value, exception, completed]
+
+    def get_or_compute(self, key, compute, cacheable=None):
+        """
+        Return the cached value for key, or call compute() once and cache its result
+        if cacheable(result) allows it (by default: anything that is not an error)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                self.misses += 1
+                flight = self._inflight[key] = [threading.Event(), None, None, False]
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            flight[0].wait()
+            # Waiters see the leader's failure rather than an empty result
+            if flight[2] is not None:
+                raise flight[2]
+            if not flight[3]:
+                # The leader's script was stopped or rerun (a BaseException that
+                # belongs to its session only), so compute this value here
+                return compute()
+            return flight[1]
+        
+        try:
+            flight[1] = compute()
+            flight[3] = True
+        except Exception as e:
+            flight[2] = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                value = flight[1]
+                if value is not None and self.maxsize > 0 and not _is_error(value) \
+                        and (cacheable is None or cacheable(value)):
+                    self._entries[key] = (time.monotonic() + self.ttl, value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+            flight[0].set()
+        return flight[1]
+
+    def stats(self):
+        """
+        Hit/miss counters and current size, for reporting cache effectiveness
+        """
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'hit_rate': (self.hits + self.coalesced) / lookups if lookups else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _is_error(value):
+    text = value[0] if isinstance(value, tuple) else value
+    return isinstance(text, str) and text.startswith("⚠️")
+
+
+def _has_payload(value):
+    # A structured analysis without a payload is a fallback; let the next request retry
+    return value[1] is not None
+
+
+response_cache = ResponseCache(
+    maxsize=int(os.getenv("PRAYAAS_CACHE_SIZE", "512")),
+    ttl=int(os.getenv("PRAYAAS_CACHE_TTL", str(6 * 3600)))
+)
+
+# Request/response archive for analytics (enabled by PRAYAAS_ARCHIVE_DIR)
+response_archive = open_archive_from_env()
+
 # -------------------------
 # Gemini call function
 # -------------------------
-def call_gemini(prompt: str, max_output_tokens: int = 4096):
+def call_gemini(prompt: str, max_output_tokens: int = 4096, response_schema=None):
     """
-    Call Google Gemini API with the given prompt
+    Call Google Gemini API with the given prompt.
+    When response_schema is given, Gemini is constrained to return JSON matching it.
     """
     try:
         model = genai.GenerativeModel("gemini-2.0-flash")
+        config = dict(max_output_tokens=max_output_tokens, temperature=0.7)
+        if response_schema is not None:
+            config['response_mime_type'] = "application/json"
+            config['response_schema'] = response_schema
         response = model.generate_content(
             prompt,
-            generation_config=genai.types.GenerationConfig(
-                max_output_tokens=max_output_tokens,
-                temperature=0.7
-            )
+            generation_config=genai.types.GenerationConfig(**config)
         )
         return response.text
     except Exception as e:
         return f"⚠️ Error calling Gemini: {str(e)}"
 
+# -------------------------
+# Response schema for structured policy analysis
+# -------------------------
+POLICY_ANALYSIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "analysis": {"type": "STRING"},
+        "policy_name": {"type": "STRING"},
+        "premium_min": {"type": "NUMBER"},
+        "premium_max": {"type": "NUMBER"},
+        "coverage_amount": {"type": "NUMBER"},
+        "policy_term_years": {"type": "INTEGER"},
+        "key_features": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "suitability_score": {"type": "INTEGER"},
+        "claim_settlement_ratio": {"type": "NUMBER"},
+        "flexibility_score": {"type": "INTEGER"}
+    },
+    "required": ["analysis", "premium_min", "premium_max", "coverage_amount", "policy_term_years", "suitability_score"]
+}
+
 # -------------------------
 # Web search function using DuckDuckGo
 # -------------------------
@@ -53,8 +189,28 @@ def search_web(query, max_results=5):
 # -------------------------
 def recommend_policy(age, income_range, occupation, family_members, existing_insurance, health_conditions, language="English"):
     """
-    Get policy recommendations based on user profile
+    Get policy recommendations based on user profile.
+    Users in the same profile bucket share one cached response.
     """
+    user_details = {
+        'age': age,
+        'income_range': income_range,
+        'occupation': occupation,
+        'family_members': family_members,
+        'existing_insurance': existing_insurance,
+        'health_conditions': health_conditions
+    }
+    profile = canonical_profile(user_details)
+    key = ('recommend', profile_bucket(user_details), language)
+    response = response_cache.get_or_compute(key, lambda: _recommend_policy(profile, language))
+    if response_archive is not None:
+        response_archive.record('recommend', {'profile': profile, 'language': language}, response)
+    return response
+
+def _recommend_policy(profile, language):
+    occupation = profile['occupation']
+    income_range = profile['income_range']
+    
     # Search for popular policies based on user profile
     search_query = f"best insurance policies for {occupation} with income {income_range} India 2025"
     search_results = search_web(search_query)
@@ -71,12 +227,12 @@ def recommend_policy(age, income_range, occupation, family_members, existing_ins
     You are an insurance expert recommending the best insurance policies for users in India.
     
     User Details:
-    - Age: {age}
+    - Age: {profile['age']}
     - Annual Income Range: {income_range}
     - Occupation: {occupation}
-    - Family Members: {family_members}
-    - Existing Insurance: {existing_insurance}
-    - Health Conditions: {health_conditions}
+    - Family Members: {profile['family_members']}
+    - Existing Insurance: {', '.join(profile['existing_insurance'])}
+    - Health Conditions: {', '.join(profile['health_conditions'])}
     
     Web Search Context about suitable policies:
     {search_context}
@@ -100,10 +256,31 @@ def recommend_policy(age, income_range, occupation, family_members, existing_ins
 # -------------------------
 # Policy analysis function with web search
 # -------------------------
-def analyze_policy(policy_name, user_details, language="English"):
+def analyze_policy(policy_name, user_details, language="English", structured=False):
     """
-    Analyze a specific insurance policy
+    Analyze a specific insurance policy.
+    With structured=True, returns (analysis_text, payload) where payload is the
+    schema-constrained JSON dict, or None if Gemini did not return valid JSON
+    (the analysis text then comes from a plain, unstructured retry).
+    Users in the same profile bucket share one cached analysis per policy.
     """
+    profile = canonical_profile(user_details)
+    policy_key = ' '.join(policy_name.lower().split())
+    key = ('analyze', policy_key, profile_bucket(user_details), language, structured)
+    result = response_cache.get_or_compute(
+        key, lambda: _analyze_policy(policy_name, profile, language, structured),
+        cacheable=_has_payload if structured else None
+    )
+    if response_archive is not None:
+        analysis, payload = result if structured else (result, None)
+        response_archive.record(
+            'analyze',
+            {'policy_name': policy_name, 'profile': profile, 'language': language, 'structured': structured},
+            analysis, payload
+        )
+    return result
+
+def _analyze_policy(policy_name, profile, language, structured):
     # Search for policy information
     search_query = f"{policy_name} insurance policy India benefits features 2025"
     search_results = search_web(search_query)
@@ -120,12 +297,12 @@ def analyze_policy(policy_name, user_details, language="English"):
     Analyze the insurance policy: {policy_name}
     
     User Details:
-    - Age: {user_details.get('age', 'Not provided')}
-    - Annual Income Range: {user_details.get('income_range', 'Not provided')}
-    - Occupation: {user_details.get('occupation', 'Not provided')}
-    - Family Members: {user_details.get('family_members', 'Not provided')}
-    - Existing Insurance: {user_details.get('existing_insurance', 'Not provided')}
-    - Health Conditions: {user_details.get('health_conditions', 'Not provided')}
+    - Age: {profile['age']}
+    - Annual Income Range: {profile['income_range']}
+    - Occupation: {profile['occupation']}
+    - Family Members: {profile['family_members']}
+    - Existing Insurance: {', '.join(profile['existing_insurance'])}
+    - Health Conditions: {', '.join(profile['health_conditions'])}
     
     Web Search Context:
     {search_context}
@@ -143,7 +320,33 @@ def analyze_policy(policy_name, user_details, language="English"):
     Be objective and evidence-based in your analysis.
     """
     
-    return call_gemini(prompt, max_output_tokens=4096)
+    if not structured:
+        return call_gemini(prompt, max_output_tokens=4096)
+    
+    structured_prompt = prompt + """
+    Return a JSON object. Put the full markdown analysis above in the "analysis" field.
+    Fill the remaining fields with numbers only, whatever the response language:
+    - premium_min / premium_max: estimated annual premium in rupees
+    - coverage_amount: sum assured in rupees
+    - policy_term_years: policy term in years
+    - key_features: up to 5 short feature descriptions
+    - suitability_score, flexibility_score: 0-100 for this user
+    - claim_settlement_ratio: insurer's claim settlement ratio in percent
+    """
+    
+    # Escaping the prose inside a JSON string costs extra tokens, so allow more output
+    response = call_gemini(structured_prompt, max_output_tokens=8192, response_schema=POLICY_ANALYSIS_SCHEMA)
+    if response.startswith("⚠️"):
+        return response, None
+    try:
+        payload = json.loads(response)
+    except ValueError:
+        payload = None
+    if isinstance(payload, dict) and payload.get('analysis'):
+        return payload['analysis'], payload
+    
+    # Truncated or malformed JSON: never show the raw fragment, ask again for plain prose
+    return call_gemini(prompt, max_output_tokens=4096), None
 
 # -------------------------
 # Chat function with auto language detection
@@ -166,4 +369,9 @@ def chat_with_user(message, chat_history, language="English"):
     If the user asks about a specific policy, offer to analyze it for them.
     """
     
-    return call_gemini(prompt)
\ No newline at end of file
+    response = call_gemini(prompt)
+    if response_archive is not None:
+        response_archive.record(
+            'chat', {'message': message, 'history': chat_history, 'language': language}, response
+        )
+    return response
\ No newline at end of file
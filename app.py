@@ -1,11 +1,65 @@
+import os
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as PoolTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 import streamlit as st
 import plotly.express as px
 from apicalls import recommend_policy, analyze_policy, chat_with_user
+from chat_store import ChatSessionStore, PAGE_SIZE
 from helpers import (
-    INDIAN_OCCUPATIONS, INCOME_RANGES,
-    create_policy_visualizations
+    INDIAN_OCCUPATIONS, INCOME_RANGES, INSURANCE_OPTIONS, HEALTH_OPTIONS,
+    analysis_stage, profile_stage, run_stage_json, figures_from_json
 )
 
+# EXPERIMENTAL: run analysis post-processing (extraction, scoring, figures) in a
+# shared process pool. No tail-latency gain has been measured yet: the only run
+# (1 vCPU) had analysis p95 worse, 2.02 s offloaded vs 1.77 s inline. Keep it off
+# unless a multi-core loadtest.py run with and without --offload shows lower p95/p99.
+OFFLOAD_POSTPROCESSING = os.getenv("PRAYAAS_OFFLOAD", "0") == "1"
+# Seconds to wait for a pool result before giving up and running the stage inline
+POOL_TIMEOUT = float(os.getenv("PRAYAAS_POOL_TIMEOUT", "30"))
+
+# -------------------------
+# Shared resources
+# -------------------------
+@st.cache_resource
+def get_chat_store():
+    return ChatSessionStore()
+
+@st.cache_resource
+def get_postprocess_pool():
+    # Streamlit runs this script as __main__, so spawn/forkserver workers would
+    # re-execute app.py on startup; fork avoids that where it is available.
+    # Known deadlock risk: forking the multi-threaded Streamlit/Tornado process
+    # copies locks held by other threads (the archive writer, logging, the
+    # response cache), and a child that touches such a lock can hang.
+    # Workers only run the pure helpers stages, which keeps the risk low
+    # but does not remove it.
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    # Leave one core for the Streamlit script threads
+    workers = int(os.getenv("PRAYAAS_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+def run_stage(stage, *args):
+    """
+    Run an analysis pipeline stage inline, or in the process pool when offloading is enabled
+    """
+    if OFFLOAD_POSTPROCESSING:
+        pool = get_postprocess_pool()
+        try:
+            figures_json, policy_data = pool.submit(run_stage_json, stage, *args).result(timeout=POOL_TIMEOUT)
+            return figures_from_json(figures_json), policy_data
+        except (BrokenProcessPool, PoolTimeoutError):
+            # A broken pool, or a worker deadlocked on a lock copied by fork: reap
+            # the executor and its workers before the next call creates a fresh one
+            workers = list((getattr(pool, "_processes", None) or {}).values())
+            pool.shutdown(wait=False, cancel_futures=True)
+            for process in workers:
+                process.terminate()
+            get_postprocess_pool.clear()
+    return stage(*args)
+
 # -------------------------
 # Streamlit UI
 # -------------------------
@@ -22,14 +76,8 @@ with st.sidebar:
     income_range = st.selectbox("Annual Income Range", INCOME_RANGES)
     occupation = st.selectbox("Occupation", INDIAN_OCCUPATIONS)
     family_members = st.slider("Family Members", 1, 10, 4)
-    existing_insurance = st.multiselect("Existing Insurance", [
-        "Term Life", "Health Insurance", "Car Insurance", 
-        "Home Insurance", "Investment Plans", "None"
-    ])
-    health_conditions = st.multiselect("Health Conditions", [
-        "None", "Diabetes", "Hypertension", "Heart Condition", 
-        "Respiratory Issues", "Other Chronic Condition"
-    ])
+    existing_insurance = st.multiselect("Existing Insurance", INSURANCE_OPTIONS)
+    health_conditions = st.multiselect("Health Conditions", HEALTH_OPTIONS)
     
     language = st.selectbox("Preferred Language", [
         "Hindi", "Gujarati", "Tamil", "Telugu", "Bengali", 
@@ -84,30 +132,73 @@ with tab1:
 with tab2:
     st.header("🔍 Policy Analysis")
     
-    col1 = st.columns([3,1])[0]
+    col1, col2 = st.columns([3,1])
     with col1:
         policy_name = st.text_input("Enter policy name to analyze")
+    with col2:
+        structured_mode = st.toggle("Structured output", value=True,
+                                    help="Ask Gemini for typed JSON figures alongside the analysis (more reliable charts)")
+        dashboard_mode = st.toggle("Single dashboard", value=False,
+                                   help="Render all charts as one combined figure (lighter page on slow connections)")
+    
+    user_details = {
+        'age': age,
+        'income_range': income_range,
+        'occupation': occupation,
+        'family_members': family_members,
+        'existing_insurance': existing_insurance,
+        'health_conditions': health_conditions
+    }
     
     if st.button("Analyze Policy", type="primary") and policy_name:
-        user_details = {
-            'age': age,
-            'income_range': income_range,
-            'occupation': occupation,
-            'family_members': family_members,
-            'existing_insurance': existing_insurance,
-            'health_conditions': health_conditions
+        with st.spinner(f"Analyzing {policy_name} and searching for current information..."):
+            payload = None
+            if structured_mode:
+                analysis, payload = analyze_policy(policy_name, user_details, language, structured=True)
+            else:
+                analysis = analyze_policy(policy_name, user_details, language)
+        
+        # Profile-independent stage results are kept per chart mode, so sidebar
+        # changes below only re-run the cheap profile stage
+        st.session_state.policy_analysis = {
+            'policy_name': policy_name,
+            'analysis': analysis,
+            'payload': payload,
+            'stages': {}
         }
+    
+    current = st.session_state.get("policy_analysis")
+    if current:
+        analyzed_name = current['policy_name']
+        stages = current['stages']
+        if dashboard_mode not in stages:
+            stages[dashboard_mode] = run_stage(
+                analysis_stage, analyzed_name, current['analysis'], current['payload'], dashboard_mode
+            )
+        static_figures, base_data = stages[dashboard_mode]
+        # Chat messages and other tabs rerun the script too; only recompute the
+        # profile stage when a sidebar value or the chart mode actually changed
+        profile_key = (
+            age, income_range, occupation, family_members,
+            tuple(existing_insurance), tuple(health_conditions), dashboard_mode
+        )
+        if current.get('profile_key') != profile_key:
+            current['profile_result'] = run_stage(
+                profile_stage, analyzed_name, base_data, user_details, dashboard_mode
+            )
+            current['profile_key'] = profile_key
+        profile_figures, policy_data = current['profile_result']
+        visualizations = {**profile_figures, **static_figures}
         
-        with st.spinner(f"Analyzing {policy_name} and searching for current information..."):
-            analysis = analyze_policy(policy_name, user_details, language)
-            
-            st.success(f"Analysis of {policy_name}:")
-            st.markdown(analysis)
-            
-            # Create all visualizations
-            st.subheader("📈 Comprehensive Policy Analysis")
-            visualizations, policy_data = create_policy_visualizations(policy_name, analysis, user_details)
-            
+        st.success(f"Analysis of {analyzed_name}:")
+        st.markdown(current['analysis'])
+        
+        # Create all visualizations
+        st.subheader("📈 Comprehensive Policy Analysis")
+        
+        if dashboard_mode:
+            st.plotly_chart(visualizations['dashboard'], use_container_width=True)
+        else:
             # Display visualizations in a grid
             col1, col2 = st.columns(2)
             with col1:
@@ -128,41 +219,61 @@ with tab2:
                 st.plotly_chart(visualizations['premium_breakdown'], use_container_width=True)
 
             st.plotly_chart(visualizations['comparison'], use_container_width=True)
-            
-            # Display extracted policy data
-            st.subheader("📋 Policy Details")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Premium Range", policy_data['premium_range'])
-            with col2:
-                st.metric("Coverage Amount", policy_data['coverage_amount'])
-            with col3:
-                st.metric("Policy Term", policy_data['policy_term'])
-            
-            # Display key features
-            if policy_data['key_features']:
-                st.subheader("✨ Key Features")
-                for feature in policy_data['key_features']:
-                    st.markdown(f"✓ {feature}")
-            
-            # Final recommendation card
-            st.subheader("🎯 Recommendation")
-            if policy_data['suitability_score'] >= 70:
-                st.success(f"**Recommended** (Suitability: {policy_data['suitability_score']}%)")
-            elif policy_data['suitability_score'] >= 50:
-                st.warning(f"**Moderately Recommended** (Suitability: {policy_data['suitability_score']}%)")
-            else:
-                st.error(f"**Not Recommended** (Suitability: {policy_data['suitability_score']}%)")
+        
+        # Display extracted policy data
+        st.subheader("📋 Policy Details")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Premium Range", policy_data['premium_range'])
+        with col2:
+            st.metric("Coverage Amount", policy_data['coverage_amount'])
+        with col3:
+            st.metric("Policy Term", policy_data['policy_term'])
+        
+        # Display key features
+        if policy_data['key_features']:
+            st.subheader("✨ Key Features")
+            for feature in policy_data['key_features']:
+                st.markdown(f"✓ {feature}")
+        
+        # Final recommendation card
+        st.subheader("🎯 Recommendation")
+        if policy_data['suitability_score'] >= 70:
+            st.success(f"**Recommended** (Suitability: {policy_data['suitability_score']}%)")
+        elif policy_data['suitability_score'] >= 50:
+            st.warning(f"**Moderately Recommended** (Suitability: {policy_data['suitability_score']}%)")
+        else:
+            st.error(f"**Not Recommended** (Suitability: {policy_data['suitability_score']}%)")
 
 with tab3:
     st.header("💬 Chat with PRAYAAS")
     
-    # Initialize chat history
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    chat_store = get_chat_store()
+    
+    # The chat session id only goes into the URL when the user opts in: anyone
+    # holding that link can read the conversation, health details included
+    if "chat_session_id" not in st.session_state:
+        url_sid = st.query_params.get("sid", "")
+        resumed = len(url_sid) == 32 and all(c in "0123456789abcdef" for c in url_sid)
+        st.session_state.chat_session_id = url_sid if resumed else uuid.uuid4().hex
+        st.session_state.chat_in_link = resumed
+        st.session_state.chat_pages = 1
+    session_id = st.session_state.chat_session_id
+    
+    if st.toggle("Resume this chat from the page link", key="chat_in_link",
+                 help="Adds a chat key to the URL so the conversation survives a reload or restart"):
+        st.query_params["sid"] = session_id
+        st.warning("Anyone with this page link can read this conversation. Do not share the link.")
+    elif "sid" in st.query_params:
+        del st.query_params["sid"]
     
-    # Display chat messages from history on app rerun
-    for message in st.session_state.messages:
+    # Display only the most recent page(s) of history on app rerun
+    total_messages = chat_store.count(session_id)
+    shown = min(total_messages, st.session_state.chat_pages * PAGE_SIZE)
+    if shown < total_messages and st.button("⬆️ Load older messages"):
+        st.session_state.chat_pages += 1
+        shown = min(total_messages, st.session_state.chat_pages * PAGE_SIZE)
+    for message in chat_store.recent(session_id, shown):
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
     
@@ -171,17 +282,17 @@ with tab3:
         # Display user message in chat message container
         st.chat_message("user").markdown(prompt)
         # Add user message to chat history
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        chat_store.append(session_id, "user", prompt)
         
         # Generate response
         with st.spinner("Thinking..."):
-            response = chat_with_user(prompt, st.session_state.messages[-5:], language)
+            response = chat_with_user(prompt, chat_store.recent(session_id, 5), language)
         
         # Display assistant response in chat message container
         with st.chat_message("assistant"):
             st.markdown(response)
         # Add assistant response to chat history
-        st.session_state.messages.append({"role": "assistant", "content": response})
+        chat_store.append(session_id, "assistant", response)
 
 # Footer
 st.markdown("---")
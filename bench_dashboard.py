@@ -0,0 +1,63 @@
+"""
+Compare figure payload size and server-side build time for the seven
+individual charts vs. the single combined dashboard.
+
+Usage: python bench_dashboard.py [--runs 50]
+"""
+import argparse
+import statistics
+import time
+
+import plotly.io as pio
+
+from helpers import create_policy_visualizations, figure_payload_size
+
+SAMPLE_ANALYSIS = """
+## Policy overview
+The LIC Jeevan Anand plan provides a term of 25 years with coverage of 15 Lakhs.
+Premium estimates: ₹12,000 to ₹18,000 per year.
+- Covers death during the policy term
+- Provides bonus additions every year
+- Includes accidental death benefit rider
+- Offers tax benefits under Section 80C
+- Protection continues after maturity
+It is a good, comprehensive plan, though somewhat expensive for lower incomes.
+"""
+
+SAMPLE_USER = {
+    'age': 32,
+    'income_range': '₹5 Lakh - ₹7.5 Lakh',
+    'occupation': 'Farmer/Agricultural Worker',
+    'family_members': 4,
+    'existing_insurance': ['None'],
+    'health_conditions': ['None']
+}
+
+
+def bench(dashboard, runs):
+    build_ms = []
+    serialize_ms = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        figures, _ = create_policy_visualizations('LIC Jeevan Anand', SAMPLE_ANALYSIS, SAMPLE_USER, dashboard=dashboard)
+        build_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        payload = figure_payload_size(figures)
+        serialize_ms.append((time.perf_counter() - start) * 1000)
+    return payload, statistics.median(build_ms), statistics.median(serialize_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"JSON engine: {pio.json.config.default_engine}, runs: {args.runs}")
+    print(f"{'mode':<12}{'payload (KB)':>14}{'build (ms)':>12}{'serialize (ms)':>16}")
+    for label, dashboard in (('separate', False), ('dashboard', True)):
+        payload, build, serialize = bench(dashboard, args.runs)
+        print(f"{label:<12}{payload / 1024:>14.1f}{build:>12.1f}{serialize:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Estimate how much profile-bucket canonicalization helps the response cache.
+
+Simulates users drawn from the sidebar's ranges, then reports the number of
+distinct raw vs bucketed profiles and the hit rate an LRU of the given size
+would get for recommend_policy keys.
+
+Usage: python cache_report.py [--users 10000] [--cache-size 512] [--popular 0.8]
+"""
+import argparse
+import random
+from collections import OrderedDict
+
+from helpers import (
+    INCOME_RANGES, INDIAN_OCCUPATIONS, INSURANCE_OPTIONS, HEALTH_OPTIONS,
+    profile_bucket, bucket_cardinality
+)
+
+LANGUAGES = ["Hindi", "Gujarati", "Tamil", "Telugu", "Bengali", "Marathi", "Kannada", "English"]
+
+
+def sample_user(rng, popular):
+    """
+    Draw a profile; with probability `popular`, income/occupation/language come
+    from a small head of common choices (target users: farmers, daily wage workers)
+    """
+    if rng.random() < popular:
+        income = rng.choice(INCOME_RANGES[:3])
+        occupation = rng.choice(INDIAN_OCCUPATIONS[:6])
+        language = rng.choice(LANGUAGES[:3])
+    else:
+        income = rng.choice(INCOME_RANGES)
+        occupation = rng.choice(INDIAN_OCCUPATIONS)
+        language = rng.choice(LANGUAGES)
+    return {
+        'age': rng.randint(18, 80),
+        'income_range': income,
+        'occupation': occupation,
+        'family_members': rng.randint(1, 10),
+        'existing_insurance': rng.sample(INSURANCE_OPTIONS, rng.choice([0, 0, 1, 1, 2])),
+        'health_conditions': rng.sample(HEALTH_OPTIONS, rng.choice([0, 0, 1, 1, 2]))
+    }, language
+
+
+def lru_hit_rate(keys, size):
+    cache = OrderedDict()
+    hits = 0
+    for key in keys:
+        if key in cache:
+            hits += 1
+            cache.move_to_end(key)
+        else:
+            cache[key] = True
+            if len(cache) > size:
+                cache.popitem(last=False)
+    return hits / len(keys) if keys else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--cache-size', type=int, default=512)
+    parser.add_argument('--popular', type=float, default=0.8)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    raw_keys, bucket_keys = [], []
+    for _ in range(args.users):
+        user, language = sample_user(rng, args.popular)
+        raw_keys.append((repr(sorted(user.items())), language))
+        bucket_keys.append((profile_bucket(user), language))
+
+    cardinality = bucket_cardinality()
+    print(f"Key space (per language): raw {cardinality['raw']:,} -> bucketed {cardinality['bucketed']:,}")
+    print(f"Simulated users: {args.users:,}, LRU size: {args.cache_size}")
+    print(f"{'keys':<10}{'distinct':>10}{'hit rate':>10}")
+    for label, keys in (('raw', raw_keys), ('bucketed', bucket_keys)):
+        print(f"{label:<10}{len(set(keys)):>10,}{lru_hit_rate(keys, args.cache_size):>10.1%}")
+
+
+if __name__ == '__main__':
+    main()
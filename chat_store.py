@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+
+# -------------------------
+# Chat store settings
+# -------------------------
+CHAT_DB_PATH = os.getenv("PRAYAAS_CHAT_DB", "chat_sessions.db")
+PAGE_SIZE = 20
+ROLES = ("user", "assistant")
+
+# Messages shorter than this are stored as-is; zlib only pays off on longer replies
+COMPRESS_MIN_BYTES = 256
+
+
+def _pack(content):
+    data = content.encode("utf-8")
+    if len(data) >= COMPRESS_MIN_BYTES:
+        return zlib.compress(data, 6), 1
+    return data, 0
+
+
+def _unpack(data, packed):
+    if packed:
+        data = zlib.decompress(data)
+    return data.decode("utf-8")
+
+
+# -------------------------
+# Persistent chat session store
+# -------------------------
+class ChatSessionStore:
+    """
+    SQLite-backed chat history shared by all sessions of a worker.
+    Messages are stored compactly (role code + zlib-compressed text) and only a
+    small window of recent messages is kept in memory for active sessions.
+    """
+
+    def __init__(self, path=CHAT_DB_PATH, window=PAGE_SIZE, idle_seconds=900, max_sessions=500):
+        self.window = window
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._recent = OrderedDict()  # session_id -> [last_access, deque of messages, total count]
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role INTEGER NOT NULL,
+                packed INTEGER NOT NULL,
+                content BLOB NOT NULL,
+                created REAL NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            ) WITHOUT ROWID
+        """)
+        self._conn.commit()
+
+    def _load(self, session_id):
+        """
+        Return the in-memory entry for a session, reading its recent window from disk if needed.
+        Caller must hold the lock.
+        """
+        # MAX(seq) is a primary-key lookup; checking it on every access picks up
+        # messages written by other workers sharing the database
+        count = self._conn.execute(
+            "SELECT COALESCE(MAX(seq), -1) + 1 FROM messages WHERE session_id = ?", (session_id,)
+        ).fetchone()[0]
+        entry = self._recent.get(session_id)
+        if entry is None or entry[2] != count:
+            messages = self._fetch(session_id, count, self.window)
+            entry = [0.0, deque(messages, maxlen=self.window), count]
+            self._recent[session_id] = entry
+        entry[0] = time.monotonic()
+        self._recent.move_to_end(session_id)
+        # Readers add sessions too, so evict here rather than only on append
+        self._evict()
+        return entry
+
+    def _fetch(self, session_id, before_seq, limit):
+        rows = self._conn.execute(
+            "SELECT role, packed, content FROM messages WHERE session_id = ? AND seq < ? "
+            "ORDER BY seq DESC LIMIT ?",
+            (session_id, before_seq, limit)
+        ).fetchall()
+        return [{"role": ROLES[role], "content": _unpack(content, packed)} for role, packed, content in reversed(rows)]
+
+    def _evict(self):
+        """
+        Drop idle sessions (and the least recently used beyond max_sessions) from memory
+        """
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._recent:
+            session_id, entry = next(iter(self._recent.items()))
+            if entry[0] >= cutoff and len(self._recent) <= self.max_sessions:
+                break
+            del self._recent[session_id]
+
+    def append(self, session_id, role, content):
+        """
+        Persist a message and add it to the session's recent window
+        """
+        data, packed = _pack(content)
+        with self._lock:
+            entry = self._load(session_id)
+            # Other workers may share the database, so seq is assigned inside the write
+            # transaction rather than from the in-memory count
+            self._conn.execute(
+                "INSERT INTO messages (session_id, seq, role, packed, content, created) "
+                "SELECT ?, COALESCE(MAX(seq), -1) + 1, ?, ?, ?, ? FROM messages WHERE session_id = ?",
+                (session_id, ROLES.index(role), packed, data, time.time(), session_id)
+            )
+            seq = self._conn.execute(
+                "SELECT MAX(seq) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            self._conn.commit()
+            if seq == entry[2]:
+                entry[1].append({"role": role, "content": content})
+            else:
+                # Another worker wrote to this session; reload the window from disk
+                entry[1] = deque(self._fetch(session_id, seq + 1, self.window), maxlen=self.window)
+            entry[2] = seq + 1
+
+    def count(self, session_id):
+        """
+        Total number of messages stored for a session
+        """
+        with self._lock:
+            return self._load(session_id)[2]
+
+    def recent(self, session_id, limit=PAGE_SIZE):
+        """
+        Most recent messages (oldest first). Served from memory when limit fits the window.
+        """
+        with self._lock:
+            entry = self._load(session_id)
+            if limit <= self.window:
+                return list(entry[1])[-limit:] if limit else []
+            return self._fetch(session_id, entry[2], limit)
+
+    def clear(self, session_id):
+        """
+        Delete a session's history
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+            self._recent.pop(session_id, None)
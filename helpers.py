@@ -1,9 +1,24 @@
 import re
+import copy
+import json
+import math
+from dataclasses import dataclass
+from functools import lru_cache
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
 import numpy as np
 
+# orjson serializes figures several times faster than the stdlib json encoder
+try:
+    import orjson
+    pio.json.config.default_engine = "orjson"
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # -------------------------
 # Common Indian occupations
 # -------------------------
@@ -47,6 +62,222 @@ INCOME_RANGES = [
 ]
 
 
+# -------------------------
+# Multiselect options
+# -------------------------
+INSURANCE_OPTIONS = [
+    "Term Life", "Health Insurance", "Car Insurance",
+    "Home Insurance", "Investment Plans", "None"
+]
+
+HEALTH_OPTIONS = [
+    "None", "Diabetes", "Hypertension", "Heart Condition",
+    "Respiratory Issues", "Other Chronic Condition"
+]
+
+# -------------------------
+# Profile canonicalization (cache buckets)
+# -------------------------
+# (upper bound, label); ages are 18-80 and family size 1-10 in the sidebar
+AGE_BANDS = [(25, "18-25"), (35, "26-35"), (45, "36-45"), (55, "46-55"), (65, "56-65"), (80, "66-80")]
+FAMILY_BANDS = [(1, "1"), (2, "2"), (4, "3-4"), (6, "5-6"), (10, "7+")]
+
+def _band(value, bands):
+    for upper, label in bands:
+        if value <= upper:
+            return label
+    return bands[-1][1]
+
+def _canonical_list(values):
+    """
+    Sort and de-duplicate a multiselect list; "None" only survives on its own
+    """
+    if isinstance(values, str):
+        values = [values]
+    items = sorted({str(v).strip() for v in values or [] if str(v).strip()})
+    items = [v for v in items if v.lower() != "none"]
+    return tuple(items) or ("None",)
+
+def canonical_profile(user_details):
+    """
+    Map a user_details dict to its bucketed form: age/family bands and sorted lists.
+    Prompts are built from this so every user in a bucket gets the same prompt.
+    """
+    try:
+        age = _band(int(user_details.get('age', 30)), AGE_BANDS)
+    except (TypeError, ValueError):
+        age = 'Not provided'
+    try:
+        family_members = _band(int(user_details.get('family_members', 4)), FAMILY_BANDS)
+    except (TypeError, ValueError):
+        family_members = 'Not provided'
+    return {
+        'age': age,
+        'income_range': user_details.get('income_range') or 'Not provided',
+        'occupation': user_details.get('occupation') or 'Not provided',
+        'family_members': family_members,
+        'existing_insurance': _canonical_list(user_details.get('existing_insurance')),
+        'health_conditions': _canonical_list(user_details.get('health_conditions'))
+    }
+
+def profile_bucket(user_details):
+    """
+    Stable, hashable bucket key for a user profile (use as a cache key)
+    """
+    profile = canonical_profile(user_details)
+    return (
+        profile['age'], profile['income_range'], profile['occupation'], profile['family_members'],
+        profile['existing_insurance'], profile['health_conditions']
+    )
+
+def bucket_cardinality():
+    """
+    Number of distinct profiles before and after canonicalization
+    """
+    def ordered_selections(n):
+        # multiselect keeps click order: sum of n!/(n-k)! over all k
+        total, perm = 1, 1
+        for k in range(n):
+            perm *= n - k
+            total += perm
+        return total
+    
+    base = len(INCOME_RANGES) * len(INDIAN_OCCUPATIONS)
+    raw = (base * (80 - 18 + 1) * 10
+           * ordered_selections(len(INSURANCE_OPTIONS)) * ordered_selections(len(HEALTH_OPTIONS)))
+    # "None" collapses with the empty selection, the rest become unordered sets
+    bucketed = (base * len(AGE_BANDS) * len(FAMILY_BANDS)
+                * 2 ** (len(INSURANCE_OPTIONS) - 1) * 2 ** (len(HEALTH_OPTIONS) - 1))
+    return {'raw': raw, 'bucketed': bucketed}
+
+# -------------------------
+# Sample data shared by the individual charts and the dashboard
+# -------------------------
+RADAR_CATEGORIES = ['Premium Affordability', 'Coverage Adequacy', 'Benefits Match', 'Claim Settlement', 'Flexibility', 'Overall Value']
+
+SAMPLE_PLANS = [
+    {'name': 'Basic Plan', 'premium': 8000, 'coverage': 500000},
+    {'name': 'Standard Plan', 'premium': 15000, 'coverage': 1000000},
+    {'name': 'Premium Plan', 'premium': 25000, 'coverage': 2000000}
+]
+
+DEFAULT_FEATURES = [
+    "Death Benefit",
+    "Critical Illness Cover",
+    "Tax Benefits",
+    "Premium Waiver",
+    "Accidental Death Benefit"
+]
+
+FEATURE_IMPORTANCE = [90, 85, 75, 70, 65]
+
+COMPARISON_CATEGORIES = ['Premium', 'Coverage', 'Benefits', 'Flexibility']
+
+COMPARISON_SAMPLE = {
+    'Policy A': [70, 65, 80, 60],
+    'Policy B': [80, 75, 70, 85],
+    'Policy C': [65, 85, 75, 70]
+}
+
+PREMIUM_BREAKDOWN = {
+    'Base Premium': 60,
+    'Administrative Fees': 10,
+    'Risk Charge': 15,
+    'Taxes': 10,
+    'Investment Component': 5
+}
+
+# -------------------------
+# Typed record for structured (JSON) analysis output
+# -------------------------
+@dataclass(slots=True)
+class PolicyRecord:
+    """
+    Compact, validated policy numbers returned by analyze_policy(structured=True)
+    """
+    policy_name: str
+    premium_min: float
+    premium_max: float
+    coverage_value: float
+    policy_term_years: int
+    key_features: tuple
+    suitability_score: int
+    claim_settlement_ratio: float
+    flexibility_score: int
+
+    @classmethod
+    def from_payload(cls, payload, policy_name='Current Policy'):
+        """
+        Validate a Gemini JSON payload. Returns None if the numbers are unusable.
+        """
+        if not isinstance(payload, dict):
+            return None
+        try:
+            numbers = [
+                float(payload['premium_min']),
+                float(payload['premium_max']),
+                float(payload['coverage_amount']),
+                float(payload['policy_term_years']),
+                float(payload['suitability_score']),
+                float(payload.get('claim_settlement_ratio') or 85),
+                float(payload.get('flexibility_score') or 70)
+            ]
+        except (KeyError, TypeError, ValueError, OverflowError):
+            return None
+        # json.loads accepts Infinity and NaN; reject them before any int() or range check
+        if not all(math.isfinite(n) for n in numbers):
+            return None
+        premium_min, premium_max, coverage_value = numbers[:3]
+        policy_term_years, suitability_score = int(numbers[3]), int(numbers[4])
+        claim_settlement_ratio, flexibility_score = numbers[5], int(numbers[6])
+        
+        if premium_min <= 0 or coverage_value <= 0 or policy_term_years <= 0:
+            return None
+        if premium_max < premium_min:
+            premium_min, premium_max = premium_max, premium_min
+        
+        features = payload.get('key_features') or []
+        if not isinstance(features, list):
+            features = []
+        key_features = tuple(str(f).strip() for f in features if str(f).strip())[:5]
+        
+        return cls(
+            policy_name=str(payload.get('policy_name') or policy_name).strip(),
+            premium_min=premium_min,
+            premium_max=premium_max,
+            coverage_value=coverage_value,
+            policy_term_years=policy_term_years,
+            key_features=key_features,
+            suitability_score=min(100, max(0, suitability_score)),
+            claim_settlement_ratio=min(100.0, max(0.0, claim_settlement_ratio)),
+            flexibility_score=min(100, max(0, flexibility_score))
+        )
+
+    def to_policy_data(self):
+        """
+        Convert to the policy_data dict used by the chart builders
+        """
+        return {
+            'premium_range': f"₹{self.premium_min:,.0f} to ₹{self.premium_max:,.0f}",
+            'coverage_amount': format_inr_amount(self.coverage_value),
+            'policy_term': f"{self.policy_term_years} years",
+            'key_features': list(self.key_features),
+            'suitability_score': self.suitability_score,
+            'claim_settlement_ratio': self.claim_settlement_ratio,
+            'flexibility_score': self.flexibility_score,
+            'policy_name': self.policy_name,
+            'avg_premium': (self.premium_min + self.premium_max) / 2,
+            'coverage_value': self.coverage_value
+        }
+
+def format_inr_amount(amount):
+    """
+    Format a rupee amount in Lakhs/Crores, e.g. 1000000 -> '10 Lakhs'
+    """
+    if amount >= 10000000:
+        return f"{amount / 10000000:g} Crores"
+    return f"{amount / 100000:g} Lakhs"
+
 # -------------------------
 # Extract structured data from analysis text
 # -------------------------
@@ -161,9 +392,13 @@ def calculate_coverage_score(policy_data, user_details):
         avg_income = 500000  # Default
     
     # Calculate coverage adequacy based on income and family size
-    coverage_match = re.search(r'(\d+(?:,\d+)*)', str(policy_data.get('coverage_amount', '10 Lakhs')))
-    if coverage_match:
-        coverage = float(coverage_match.group(1).replace(',', '')) * 100000  # Convert lakhs to rupees
+    # Prefer the numeric coverage_value (handles Crores); fall back to parsing Lakhs text
+    coverage = policy_data.get('coverage_value')
+    if coverage is None:
+        coverage_match = re.search(r'(\d+(?:,\d+)*)', str(policy_data.get('coverage_amount', '10 Lakhs')))
+        if coverage_match:
+            coverage = float(coverage_match.group(1).replace(',', '')) * 100000  # Convert lakhs to rupees
+    if coverage:
         # Heuristic: Good coverage is 10-15x annual income for a family
         adequate_coverage = avg_income * 10 * (1 + (family_members-1)*0.2)
         coverage_adequacy = min(100, max(20, (coverage / adequate_coverage) * 100))
@@ -173,35 +408,96 @@ def calculate_coverage_score(policy_data, user_details):
     policy_data['coverage_score'] = coverage_adequacy
     return coverage_adequacy
 
+def calculate_radar_scores(policy_data, user_details):
+    """
+    Calculate the six radar scores (in RADAR_CATEGORIES order)
+    """
+    affordability = calculate_affordability_score(policy_data, user_details)
+    coverage_adequacy = calculate_coverage_score(policy_data, user_details)
+    benefits_match = min(100, 60 + len(policy_data['key_features']) * 8)
+    claim_settlement = policy_data.get('claim_settlement_ratio', 85)
+    flexibility = policy_data.get('flexibility_score', 70)
+    
+    # Overall value (weighted average)
+    overall_value = (affordability * 0.25 + coverage_adequacy * 0.25 + 
+                    benefits_match * 0.2 + claim_settlement * 0.2 + flexibility * 0.1)
+    
+    return [affordability, coverage_adequacy, benefits_match, claim_settlement, flexibility, overall_value]
+
 # -------------------------
-# Create multiple policy visualizations
+# Analysis pipeline stages
 # -------------------------
-def create_policy_visualizations(policy_name, analysis_text, user_details):
+def analysis_stage(policy_name, analysis_text, payload=None, dashboard=False):
     """
-    Create all policy visualizations
+    Profile-independent stage: extract policy data and build the charts that do
+    not depend on the user. Run once per analysis and cache the result.
+    Uses the structured JSON payload when it validates, else falls back to regex extraction.
     """
-    # Extract structured data from analysis
-    policy_data = extract_policy_data(analysis_text)
+    record = PolicyRecord.from_payload(payload, policy_name) if payload is not None else None
+    if record is not None:
+        policy_data = record.to_policy_data()
+    else:
+        policy_data = extract_policy_data(analysis_text)
     
-    # Create all visualizations
-    radar_fig = create_radar_chart(policy_name, policy_data, user_details)
-    metrics_fig = create_metrics_chart(policy_data)
-    scatter_fig = create_premium_coverage_chart(policy_data, user_details)
-    feature_fig = create_feature_importance_chart(policy_data)
-    timeline_fig = create_benefit_timeline_chart(policy_data, user_details)
-    comparison_fig = create_policy_comparison_chart(policy_data, user_details)
-    premium_fig = create_premium_breakdown_chart(policy_data)
+    if dashboard:
+        # The dashboard is a single figure, built entirely in profile_stage
+        return {}, policy_data
     
+    return {
+        'scatter': create_premium_coverage_chart(policy_data, {}),
+        'features': create_feature_importance_chart(policy_data),
+        'premium_breakdown': create_premium_breakdown_chart(policy_data)
+    }, policy_data
+
+def profile_stage(policy_name, policy_data, user_details, dashboard=False):
+    """
+    Profile-dependent stage: scores and the charts that use them.
+    Cheap enough to re-run on every sidebar change; policy_data is not modified.
+    """
+    policy_data = dict(policy_data)
+    
+    if dashboard:
+        return {'dashboard': create_policy_dashboard(policy_name, policy_data, user_details)}, policy_data
+    
+    # Radar first: it fills in the affordability/coverage scores used by the others
+    radar_fig = create_radar_chart(policy_name, policy_data, user_details)
     return {
         'radar': radar_fig,
-        'metrics': metrics_fig,
-        'scatter': scatter_fig,
-        'features': feature_fig,
-        'timeline': timeline_fig,
-        'comparison': comparison_fig,
-        'premium_breakdown': premium_fig
+        'metrics': create_metrics_chart(policy_data),
+        'timeline': create_benefit_timeline_chart(policy_data, user_details),
+        'comparison': create_policy_comparison_chart(policy_data, user_details)
     }, policy_data
 
+# -------------------------
+# Create multiple policy visualizations
+# -------------------------
+def create_policy_visualizations(policy_name, analysis_text, user_details, payload=None, dashboard=False):
+    """
+    Create all policy visualizations (both pipeline stages in one call).
+    With dashboard=True, returns a single combined figure under the 'dashboard' key.
+    """
+    static_figures, policy_data = analysis_stage(policy_name, analysis_text, payload, dashboard)
+    profile_figures, policy_data = profile_stage(policy_name, policy_data, user_details, dashboard)
+    return {**profile_figures, **static_figures}, policy_data
+
+# -------------------------
+# Serialized visualizations (process pool offload)
+# -------------------------
+def run_stage_json(stage, *args):
+    """
+    Run a pipeline stage, returning its figures as JSON strings.
+    Meant to run in a worker process so the Streamlit script thread stays free.
+    """
+    figures, policy_data = stage(*args)
+    return {name: pio.to_json(fig, validate=False) for name, fig in figures.items()}, policy_data
+
+def figures_from_json(figures_json):
+    """
+    Rebuild figures from run_stage_json output.
+    They were validated when built, so plotly validation is skipped here.
+    """
+    return {name: go.Figure(_json_loads(spec), _validate=False) for name, spec in figures_json.items()}
+
 # -------------------------
 # Radar Chart
 # -------------------------
@@ -209,27 +505,15 @@ def create_radar_chart(policy_name, policy_data, user_details):
     """
     Create radar chart for policy analysis
     """
-    categories = ['Premium Affordability', 'Coverage Adequacy', 'Benefits Match', 'Claim Settlement', 'Flexibility', 'Overall Value']
-    
     # Calculate scores based on user profile and policy data
-    affordability = calculate_affordability_score(policy_data, user_details)
-    coverage_adequacy = calculate_coverage_score(policy_data, user_details)
-    benefits_match = min(100, 60 + len(policy_data['key_features']) * 8)
-    claim_settlement = policy_data.get('claim_settlement_ratio', 85)
-    flexibility = policy_data.get('flexibility_score', 70)
-    
-    # Overall value (weighted average)
-    overall_value = (affordability * 0.25 + coverage_adequacy * 0.25 + 
-                    benefits_match * 0.2 + claim_settlement * 0.2 + flexibility * 0.1)
-    
-    scores = [affordability, coverage_adequacy, benefits_match, claim_settlement, flexibility, overall_value]
+    scores = calculate_radar_scores(policy_data, user_details)
     
     # Create radar chart
     fig = go.Figure()
     
     fig.add_trace(go.Scatterpolar(
         r=scores,
-        theta=categories,
+        theta=RADAR_CATEGORIES,
         fill='toself',
         name=policy_name,
         line=dict(color='blue', width=2),
@@ -300,10 +584,7 @@ def create_premium_coverage_chart(policy_data, user_details):
     Create premium vs coverage scatter plot
     """
     # Sample data for comparison
-    policies = [
-        {'name': 'Basic Plan', 'premium': 8000, 'coverage': 500000},
-        {'name': 'Standard Plan', 'premium': 15000, 'coverage': 1000000},
-        {'name': 'Premium Plan', 'premium': 25000, 'coverage': 2000000},
+    policies = SAMPLE_PLANS + [
         {'name': policy_data.get('policy_name', 'Current Policy'), 
          'premium': policy_data.get('avg_premium', 18000), 
          'coverage': policy_data.get('coverage_value', 1500000)}
@@ -337,15 +618,9 @@ def create_feature_importance_chart(policy_data):
     features = policy_data.get('key_features', [])
     if not features:
         # Default features if none extracted
-        features = [
-            "Death Benefit",
-            "Critical Illness Cover",
-            "Tax Benefits",
-            "Premium Waiver",
-            "Accidental Death Benefit"
-        ]
+        features = DEFAULT_FEATURES
     
-    importance_scores = [90, 85, 75, 70, 65][:len(features)]
+    importance_scores = FEATURE_IMPORTANCE[:len(features)]
     
     fig = go.Figure()
     
@@ -413,14 +688,11 @@ def create_policy_comparison_chart(policy_data, user_details):
     Create policy comparison chart
     """
     # Sample data for comparison
-    policies = ['Policy A', 'Policy B', 'Policy C', policy_data.get('policy_name', 'Current Policy')]
+    policies = list(COMPARISON_SAMPLE) + [policy_data.get('policy_name', 'Current Policy')]
     
-    categories = ['Premium', 'Coverage', 'Benefits', 'Flexibility']
+    categories = COMPARISON_CATEGORIES
     
-    data = [
-        [70, 65, 80, 60],
-        [80, 75, 70, 85],
-        [65, 85, 75, 70],
+    data = list(COMPARISON_SAMPLE.values()) + [
         [policy_data.get('affordability_score', 75), 
          policy_data.get('coverage_score', 80),
          policy_data.get('benefits_score', 85),
@@ -457,8 +729,8 @@ def create_premium_breakdown_chart(policy_data):
     """
     Create premium breakdown pie chart
     """
-    labels = ['Base Premium', 'Administrative Fees', 'Risk Charge', 'Taxes', 'Investment Component']
-    values = [60, 10, 15, 10, 5]
+    labels = list(PREMIUM_BREAKDOWN)
+    values = list(PREMIUM_BREAKDOWN.values())
     
     fig = go.Figure()
     
@@ -475,4 +747,159 @@ def create_premium_breakdown_chart(policy_data):
         showlegend=True
     )
     
-    return fig
\ No newline at end of file
+    return fig
+
+# -------------------------
+# Combined Dashboard (single figure)
+# -------------------------
+@lru_cache(maxsize=1)
+def _dashboard_grid():
+    """
+    Build the subplot grid once; make_subplots is the slowest step of the dashboard.
+    Returns the layout as plain JSON (without template) and the pie chart domain.
+    """
+    fig = make_subplots(
+        rows=4, cols=2,
+        specs=[
+            [{'type': 'polar'}, {'type': 'xy'}],
+            [{'type': 'xy'}, {'type': 'xy'}],
+            [{'type': 'xy'}, {'type': 'domain'}],
+            [{'type': 'polar', 'colspan': 2}, None]
+        ],
+        subplot_titles=(
+            'Comprehensive Analysis', 'Policy Metrics Score',
+            'Premium vs Coverage Comparison', 'Feature Importance',
+            'Benefit Projection Timeline', 'Premium Breakdown',
+            'Policy Comparison'
+        ),
+        vertical_spacing=0.08,
+        horizontal_spacing=0.12
+    )
+    layout = fig.layout.to_plotly_json()
+    layout.pop('template', None)
+    pie_domain = fig.get_subplot(3, 2)
+    return layout, {'x': list(pie_domain.x), 'y': list(pie_domain.y)}
+
+def create_policy_dashboard(policy_name, policy_data, user_details):
+    """
+    Create one figure holding all seven charts in a subplot grid.
+    Shares a single layout/template and rounds values to keep the JSON payload small.
+    """
+    grid_layout, pie_domain = _dashboard_grid()
+    layout = copy.deepcopy(grid_layout)
+    layout['annotations'][0]['text'] = f"{policy_name} - Comprehensive Analysis"
+    
+    # Traces are plain dicts validated once by the Figure constructor; axis refs
+    # follow make_subplots' row-major numbering of the grid above
+    traces = []
+    
+    # Radar (also fills affordability/coverage scores used below)
+    scores = [round(score, 1) for score in calculate_radar_scores(policy_data, user_details)]
+    traces.append(dict(
+        type='scatterpolar', subplot='polar',
+        r=scores, theta=RADAR_CATEGORIES, fill='toself', name=policy_name,
+        line=dict(color='blue', width=2), fillcolor='rgba(65, 105, 225, 0.3)',
+        showlegend=False
+    ))
+    
+    # Metrics bars
+    metric_scores = [round(score, 1) for score in [
+        policy_data.get('affordability_score', 70),
+        policy_data.get('coverage_score', 75),
+        policy_data.get('benefits_score', 80),
+        policy_data.get('claim_settlement_ratio', 85),
+        policy_data.get('flexibility_score', 70)
+    ]]
+    traces.append(dict(
+        type='bar', xaxis='x', yaxis='y',
+        x=['Affordability', 'Coverage', 'Benefits', 'Claims', 'Flexibility'], y=metric_scores,
+        marker_color=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd'],
+        text=[f'{score:g}%' for score in metric_scores], textposition='auto',
+        showlegend=False
+    ))
+    
+    # Premium vs coverage (area-sized markers, same scaling as px.scatter)
+    plans = SAMPLE_PLANS + [{
+        'name': policy_data.get('policy_name', 'Current Policy'),
+        'premium': round(policy_data.get('avg_premium', 18000)),
+        'coverage': round(policy_data.get('coverage_value', 1500000))
+    }]
+    coverages = [plan['coverage'] for plan in plans]
+    traces.append(dict(
+        type='scatter', xaxis='x2', yaxis='y2',
+        x=[plan['premium'] for plan in plans], y=coverages,
+        text=[plan['name'] for plan in plans], mode='markers+text', textposition='top center',
+        marker=dict(size=coverages, sizemode='area', sizeref=2.0 * max(coverages) / (20 ** 2),
+                    line=dict(width=2, color='DarkSlateGrey')),
+        showlegend=False
+    ))
+    
+    # Feature importance (labels trimmed to keep the subplot readable)
+    features = policy_data.get('key_features') or DEFAULT_FEATURES
+    features = [f if len(f) <= 40 else f[:39] + '…' for f in features]
+    traces.append(dict(
+        type='bar', xaxis='x3', yaxis='y3',
+        y=features, x=FEATURE_IMPORTANCE[:len(features)], orientation='h',
+        marker_color='lightseagreen', showlegend=False
+    ))
+    
+    # Benefit timeline
+    age = user_details.get('age', 30)
+    years = list(range(age, age + 31, 5))
+    traces.append(dict(
+        type='scatter', xaxis='x4', yaxis='y4',
+        x=years, y=[round(100000 * (1.05 ** (i - age))) for i in years],
+        mode='lines+markers', name='Accumulated Benefits', line=dict(color='green', width=3)
+    ))
+    traces.append(dict(
+        type='scatter', xaxis='x4', yaxis='y4',
+        x=years, y=[15000 * (i - age) for i in years],
+        mode='lines+markers', name='Premiums Paid', line=dict(color='red', width=3)
+    ))
+    
+    # Premium breakdown
+    traces.append(dict(
+        type='pie', domain=pie_domain,
+        labels=list(PREMIUM_BREAKDOWN), values=list(PREMIUM_BREAKDOWN.values()), hole=0.4,
+        marker=dict(colors=px.colors.qualitative.Set3), textinfo='label+percent', showlegend=False
+    ))
+    
+    # Policy comparison
+    comparison = dict(COMPARISON_SAMPLE)
+    comparison[policy_data.get('policy_name', 'Current Policy')] = [round(score, 1) for score in [
+        policy_data.get('affordability_score', 75),
+        policy_data.get('coverage_score', 80),
+        policy_data.get('benefits_score', 85),
+        policy_data.get('flexibility_score', 75)
+    ]]
+    for name, values in comparison.items():
+        traces.append(dict(
+            type='scatterpolar', subplot='polar2',
+            r=values, theta=COMPARISON_CATEGORIES, fill='toself', name=name
+        ))
+    
+    for polar in ('polar', 'polar2'):
+        layout[polar].update(radialaxis=dict(visible=True, range=[0, 100], tickfont=dict(size=10)),
+                             angularaxis=dict(tickfont=dict(size=10)))
+    layout['yaxis'].update(range=[0, 100], title='Score (%)')
+    layout['xaxis2'].update(title='Annual Premium (₹)')
+    layout['yaxis2'].update(title='Coverage Amount (₹)')
+    layout['xaxis3'].update(title='Importance Score', range=[0, 100])
+    layout['xaxis4'].update(title='Age')
+    layout['yaxis4'].update(title='Amount (₹)')
+    layout.update(
+        height=1800,
+        margin=dict(l=50, r=50, t=80, b=50),
+        legend=dict(orientation='h', yanchor='top', y=-0.02, xanchor='center', x=0.5)
+    )
+    
+    return go.Figure(data=traces, layout=layout)
+
+# -------------------------
+# Payload / build-time measurement
+# -------------------------
+def figure_payload_size(figures):
+    """
+    Total serialized JSON size (bytes) of a dict of figures, as sent to the browser
+    """
+    return sum(len(pio.to_json(fig, validate=False)) for fig in figures.values())
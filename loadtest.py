@@ -0,0 +1,344 @@
+"""
+Load generator for app.py: simulates many concurrent Streamlit sessions.
+
+Each virtual user drives its own headless session (streamlit AppTest) through
+the recommendation, analysis and chat flows with random think time between
+actions. Gemini and DuckDuckGo are replaced by local stand-ins that sleep for a
+realistic, log-normally distributed latency, so no API key or network is used.
+
+Reports throughput, p50/p95/p99 latency per flow, and CPU / RSS per worker.
+
+Usage:
+    python loadtest.py --users 20 --duration 60
+    python loadtest.py --users 40 --workers 2 --think-time 5 --gemini-latency 3
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+import warnings
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+FLOWS = ("recommend", "analyze", "chat")
+
+POLICIES = [
+    "LIC Jeevan Anand", "HDFC Click 2 Protect", "Star Health Family Optima",
+    "PM Jeevan Jyoti Bima Yojana", "Ayushman Bharat PM-JAY", "ICICI iProtect Smart"
+]
+
+CHAT_MESSAGES = [
+    "What is a term insurance plan?",
+    "How much health cover does a family of four need?",
+    "What does claim settlement ratio mean?",
+    "Is PMJJBY good for a farmer?"
+]
+
+STAND_IN_ANALYSIS = """
+## Policy overview
+This plan provides a term of 25 years with coverage of 15 Lakhs.
+Premium estimates: ₹12,000 to ₹18,000 per year.
+- Covers death during the policy term
+- Provides bonus additions every year
+- Includes accidental death benefit rider
+- Offers tax benefits under Section 80C
+- Protection continues after maturity
+It is a good, comprehensive plan, though somewhat expensive for lower incomes.
+""" * 6
+
+
+# -------------------------
+# Stand-in backends
+# -------------------------
+def install_stand_ins(gemini_latency, search_latency, sigma, use_cache):
+    """
+    Replace the Gemini and DuckDuckGo calls in apicalls with local fakes.
+    Latencies are log-normal with the given median (seconds).
+    """
+    os.environ.setdefault("GEMINI_API_KEY", "load-test")
+    import apicalls
+
+    def sleep_lognormal(median):
+        if median > 0:
+            time.sleep(random.lognormvariate(0, sigma) * median)
+
+    def fake_gemini(prompt, max_output_tokens=4096, response_schema=None):
+        sleep_lognormal(gemini_latency)
+        if response_schema is not None:
+            return json.dumps({
+                "analysis": STAND_IN_ANALYSIS,
+                "policy_name": "Stand-in Policy",
+                "premium_min": 12000,
+                "premium_max": 18000,
+                "coverage_amount": 1500000,
+                "policy_term_years": 25,
+                "key_features": ["Death benefit", "Bonus additions", "Accident rider"],
+                "suitability_score": 75,
+                "claim_settlement_ratio": 97.5,
+                "flexibility_score": 70
+            })
+        return STAND_IN_ANALYSIS
+
+    def fake_search(query, max_results=5):
+        sleep_lognormal(search_latency)
+        return [{"title": f"Result {i}", "body": f"Snippet about {query}"} for i in range(max_results)]
+
+    apicalls.call_gemini = fake_gemini
+    apicalls.search_web = fake_search
+    if not use_cache:
+        apicalls.response_cache.maxsize = 0
+    apicalls.response_cache.clear()
+
+
+# -------------------------
+# Headless sessions
+# -------------------------
+def pin_test_runtime():
+    """
+    AppTest installs a mock Runtime before every run and clears it afterwards,
+    which breaks sessions running concurrently. Install one shared mock for the
+    whole process and point AppTest at a subclass so its set/clear is a no-op.
+    """
+    from unittest.mock import MagicMock
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.testing.v1 import app_test
+
+    # The mock's cache-expiry coroutine is never awaited; that is expected here
+    warnings.filterwarnings("ignore", message="coroutine 'expire_cache' was never awaited")
+
+    shared_runtime = MagicMock(spec=Runtime)
+    shared_runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared_runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = shared_runtime
+    app_test.Runtime = type("PinnedRuntime", (Runtime,), {})
+
+
+# -------------------------
+# Virtual user
+# -------------------------
+def _find(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def run_user(user_id, deadline, think_time, weights, timeout, results, errors):
+    """
+    One simulated session: pick a flow, run it, record latency, think, repeat
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(user_id)
+    at = None
+
+    while time.monotonic() < deadline:
+        flow = rng.choices(FLOWS, weights=weights)[0]
+        try:
+            if at is None:
+                # (Re)open the session; the initial page load is not timed
+                at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+                at.run()
+            at.sidebar.slider[0].set_value(rng.randint(18, 80))
+            at.sidebar.slider[1].set_value(rng.randint(1, 10))
+
+            start = time.perf_counter()
+            if flow == "recommend":
+                _find(at.button, "Get Policy Recommendations").click()
+                at.run()
+            elif flow == "analyze":
+                at.text_input[0].input(rng.choice(POLICIES))
+                _find(at.button, "Analyze Policy").click()
+                at.run()
+            else:
+                at.chat_input[0].set_value(rng.choice(CHAT_MESSAGES))
+                at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+            if not at.sidebar.slider:
+                # Concurrent AppTest runs occasionally return an empty page
+                raise RuntimeError("empty page returned")
+            results[flow].append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(f"{flow}: {type(e).__name__}: {e}")
+            # Start a fresh session after a failure
+            at = None
+
+        time.sleep(rng.expovariate(1 / think_time) if think_time > 0 else 0)
+
+
+# -------------------------
+# Resource sampling
+# -------------------------
+def current_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def children_cpu_seconds():
+    """
+    CPU time of live child processes (e.g. the post-processing pool)
+    """
+    total = 0.0
+    for child in multiprocessing.active_children():
+        try:
+            with open(f"/proc/{child.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        except (OSError, ValueError, IndexError):
+            pass
+    return total
+
+
+def sample_resources(stop, samples, interval=0.5):
+    while not stop.is_set():
+        samples.append(current_rss_mb())
+        stop.wait(interval)
+
+
+# -------------------------
+# Worker
+# -------------------------
+def run_worker(args, worker_id, n_users):
+    """
+    Run n_users sessions in this process (one app.py worker) and return its stats
+    """
+    os.environ.setdefault("PRAYAAS_CHAT_DB", os.path.join(tempfile.mkdtemp(), "loadtest_chat.db"))
+    install_stand_ins(args.gemini_latency, args.search_latency, args.sigma, args.cache)
+    pin_test_runtime()
+    if args.offload:
+        os.environ["PRAYAAS_OFFLOAD"] = "1"
+
+    weights = [args.recommend_weight, args.analyze_weight, args.chat_weight]
+    results = {flow: [] for flow in FLOWS}
+    errors = []
+    rss_samples = []
+    stop = threading.Event()
+    monitor = threading.Thread(target=sample_resources, args=(stop, rss_samples), daemon=True)
+    monitor.start()
+
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    deadline = wall_start + args.duration
+    threads = []
+    for i in range(n_users):
+        t = threading.Thread(
+            target=run_user,
+            args=(worker_id * 10000 + i, deadline, args.think_time, weights, args.timeout, results, errors),
+            daemon=True
+        )
+        t.start()
+        threads.append(t)
+        # Ramp up gradually instead of starting every session at once
+        time.sleep(args.ramp_up / max(1, n_users))
+    for t in threads:
+        t.join(timeout=args.duration + args.timeout + 30)
+
+    wall = time.monotonic() - wall_start
+    cpu = time.process_time() - cpu_start
+    pool_cpu = children_cpu_seconds()
+    stop.set()
+    monitor.join()
+    return {
+        "worker": worker_id,
+        "users": n_users,
+        "wall": wall,
+        "cpu_percent": 100 * cpu / wall if wall else 0.0,
+        "pool_cpu_percent": 100 * pool_cpu / wall if wall else 0.0,
+        "rss_mean_mb": statistics.fmean(rss_samples) if rss_samples else 0.0,
+        "rss_peak_mb": max(rss_samples) if rss_samples else 0.0,
+        "results": results,
+        "errors": errors
+    }
+
+
+def _worker_entry(args, worker_id, n_users, queue):
+    queue.put(run_worker(args, worker_id, n_users))
+
+
+# -------------------------
+# Reporting
+# -------------------------
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(stats, duration):
+    print(f"\n{'flow':<12}{'count':>8}{'req/s':>9}{'p50 (s)':>10}{'p95 (s)':>10}{'p99 (s)':>10}")
+    total = 0
+    for flow in FLOWS + ("all",):
+        if flow == "all":
+            latencies = [lat for s in stats for f in FLOWS for lat in s["results"][f]]
+        else:
+            latencies = [lat for s in stats for lat in s["results"][flow]]
+            total += len(latencies)
+        print(f"{flow:<12}{len(latencies):>8}{len(latencies) / duration:>9.2f}"
+              f"{percentile(latencies, 50):>10.2f}{percentile(latencies, 95):>10.2f}{percentile(latencies, 99):>10.2f}")
+
+    print(f"\n{'worker':<8}{'users':>7}{'CPU %':>8}{'pool CPU %':>12}{'RSS mean (MB)':>15}{'RSS peak (MB)':>15}{'errors':>8}")
+    for s in stats:
+        print(f"{s['worker']:<8}{s['users']:>7}{s['cpu_percent']:>8.1f}{s['pool_cpu_percent']:>12.1f}"
+              f"{s['rss_mean_mb']:>15.1f}{s['rss_peak_mb']:>15.1f}{len(s['errors']):>8}")
+
+    errors = [e for s in stats for e in s["errors"]]
+    if errors:
+        print(f"\nFirst errors ({len(errors)} total):")
+        for e in errors[:5]:
+            print(f"  {e}")
+    print(f"\nThroughput: {total / duration:.2f} req/s over {duration:.0f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10, help="concurrent sessions in total")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (users are split evenly)")
+    parser.add_argument("--duration", type=float, default=60, help="test length in seconds")
+    parser.add_argument("--ramp-up", type=float, default=5, help="seconds to start all sessions")
+    parser.add_argument("--think-time", type=float, default=3, help="mean think time between actions (exponential)")
+    parser.add_argument("--gemini-latency", type=float, default=2.5, help="median stand-in Gemini latency (s)")
+    parser.add_argument("--search-latency", type=float, default=0.8, help="median stand-in search latency (s)")
+    parser.add_argument("--sigma", type=float, default=0.4, help="log-normal spread of stand-in latencies")
+    parser.add_argument("--recommend-weight", type=float, default=1)
+    parser.add_argument("--analyze-weight", type=float, default=2)
+    parser.add_argument("--chat-weight", type=float, default=3)
+    parser.add_argument("--timeout", type=float, default=120, help="per-rerun timeout (s)")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache enabled")
+    parser.add_argument("--offload", action="store_true", help="run analysis post-processing in the process pool")
+    args = parser.parse_args()
+
+    print(f"{args.users} users on {args.workers} worker(s) for {args.duration:.0f}s, "
+          f"think time ~{args.think_time}s, Gemini ~{args.gemini_latency}s, search ~{args.search_latency}s")
+
+    split = [args.users // args.workers + (1 if i < args.users % args.workers else 0) for i in range(args.workers)]
+    if args.workers == 1:
+        stats = [run_worker(args, 0, split[0])]
+    else:
+        queue = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_worker_entry, args=(args, i, n, queue)) for i, n in enumerate(split)]
+        for p in procs:
+            p.start()
+        stats = sorted((queue.get() for _ in procs), key=lambda s: s["worker"])
+        for p in procs:
+            p.join()
+
+    report(stats, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+Append-only, chunk-compressed archive of Gemini requests and responses.
+
+Records are buffered by a background thread and written in chunks: each chunk
+is a small header followed by compressed JSON lines (zstd when the zstandard
+package is installed, else gzip). A separate index file holds one line per
+chunk with its offset, timestamp range, kinds, policies and languages, so
+readers can skip straight to matching chunks and decompress one at a time.
+
+Usage:
+    python response_archive.py replay archive/ --policy "LIC Jeevan Anand" --age 35
+"""
+import argparse
+import atexit
+import gzip
+import json
+import os
+import queue
+import struct
+import threading
+import time
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process archives only
+    fcntl = None
+
+# -------------------------
+# On-disk format
+# -------------------------
+DATA_FILE = "responses.bin"
+INDEX_FILE = "index.jsonl"
+MAGIC = b"PRA1"
+HEADER = struct.Struct("<4sBII")  # magic, codec, compressed length, record count
+CODEC_GZIP = 0
+CODEC_ZSTD = 1
+
+
+def _compress(data):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), CODEC_ZSTD
+    return gzip.compress(data, compresslevel=6), CODEC_GZIP
+
+
+def _decompress(data, codec):
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Archive chunk is zstd-compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _policy_key(policy_name):
+    return " ".join(str(policy_name).lower().split())
+
+
+# -------------------------
+# Asynchronous writer
+# -------------------------
+class ResponseArchive:
+    """
+    Non-blocking archive writer. record() only enqueues; a daemon thread
+    compresses and appends a chunk every chunk_records records or
+    flush_interval seconds. If the queue is full, records are dropped
+    (and counted) rather than slowing down the request path.
+    """
+
+    def __init__(self, directory, chunk_records=256, flush_interval=5.0, max_queue=10000):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_records = chunk_records
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.write_errors = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._flush_requested = threading.Event()
+        self._flushed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="response-archive", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush, timeout=2.0)
+
+    def record(self, kind, request, response, payload=None):
+        """
+        Queue one request/response pair for archiving (never blocks)
+        """
+        entry = {
+            "ts": time.time(),
+            "kind": kind,
+            "language": request.get("language"),
+            "policy": request.get("policy_name"),
+            "request": request,
+            "response": response
+        }
+        if payload is not None:
+            entry["payload"] = payload
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=10.0):
+        """
+        Write out everything queued so far (blocks; for shutdown and tests)
+        """
+        self._flushed.clear()
+        self._flush_requested.set()
+        return self._flushed.wait(timeout)
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, min(0.5, deadline - time.monotonic()))))
+            except queue.Empty:
+                pass
+            flush_now = self._flush_requested.is_set()
+            if flush_now:
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+            while len(batch) >= self.chunk_records:
+                self._write_chunk(batch[:self.chunk_records])
+                batch = batch[self.chunk_records:]
+            if batch and (flush_now or time.monotonic() >= deadline):
+                self._write_chunk(batch)
+                batch = []
+            if time.monotonic() >= deadline or flush_now:
+                deadline = time.monotonic() + self.flush_interval
+            if flush_now:
+                self._flush_requested.clear()
+                self._flushed.set()
+
+    def _write_chunk(self, batch):
+        # Any failure (disk, serialization, codec) drops this chunk but must not
+        # kill the writer thread, or every later record() would be dropped too
+        try:
+            self._append_chunk(batch)
+        except Exception:
+            self.write_errors += 1
+
+    def _append_chunk(self, batch):
+        # Serialize per record so one bad record is skipped (and counted), not the chunk
+        lines, entries = [], []
+        for entry in batch:
+            try:
+                lines.append(json.dumps(entry, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+            except (TypeError, ValueError, RecursionError):
+                self.write_errors += 1
+                continue
+            entries.append(entry)
+        if not entries:
+            return
+        batch = entries
+        raw = b"".join(lines)
+        data, codec = _compress(raw)
+        index_entry = {
+            "length": HEADER.size + len(data),
+            "count": len(batch),
+            "raw_bytes": len(raw),
+            "ts_min": min(entry["ts"] for entry in batch),
+            "ts_max": max(entry["ts"] for entry in batch),
+            "kinds": sorted({entry["kind"] for entry in batch}),
+            "policies": sorted({_policy_key(entry["policy"]) for entry in batch if entry["policy"]}),
+            "languages": sorted({entry["language"] for entry in batch if entry["language"]})
+        }
+        data_path = os.path.join(self.directory, DATA_FILE)
+        with open(data_path, "ab") as f:
+            # Several workers may share the directory: hold an exclusive lock over
+            # both appends so the offset read here is where this chunk lands
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0, os.SEEK_END)
+                index_entry = {"offset": f.tell(), **index_entry}
+                f.write(HEADER.pack(MAGIC, codec, len(data), len(batch)))
+                f.write(data)
+                f.flush()
+                # Index is written after the data, so a crash never indexes a partial chunk
+                with open(os.path.join(self.directory, INDEX_FILE), "a", encoding="utf-8") as index:
+                    index.write(json.dumps(index_entry, ensure_ascii=False) + "\n")
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def open_archive_from_env():
+    """
+    Archive writer configured by PRAYAAS_ARCHIVE_DIR, or None when archiving is off
+    """
+    directory = os.getenv("PRAYAAS_ARCHIVE_DIR")
+    return ResponseArchive(directory) if directory else None
+
+
+# -------------------------
+# Streaming reader
+# -------------------------
+class ArchiveReader:
+    """
+    Reads an archive chunk by chunk, using the index to skip non-matching chunks.
+    Only one decompressed chunk is held in memory at a time.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def chunks(self, since=None, until=None, kind=None, policy=None, language=None):
+        """
+        Index entries of chunks that may contain matching records
+        """
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        policy = _policy_key(policy) if policy else None
+        with open(index_path, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if since is not None and entry["ts_max"] < since:
+                    continue
+                if until is not None and entry["ts_min"] > until:
+                    continue
+                if kind and kind not in entry["kinds"]:
+                    continue
+                if policy and policy not in entry["policies"]:
+                    continue
+                if language and language not in entry["languages"]:
+                    continue
+                yield entry
+
+    def records(self, since=None, until=None, kind=None, policy=None, language=None):
+        """
+        Stream archived records matching all given filters
+        """
+        policy = _policy_key(policy) if policy else None
+        data_path = os.path.join(self.directory, DATA_FILE)
+        if not os.path.exists(data_path):
+            return
+        with open(data_path, "rb") as f:
+            for entry in self.chunks(since, until, kind, policy, language):
+                f.seek(entry["offset"])
+                magic, codec, length, _ = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC:
+                    raise ValueError(f"Corrupt archive chunk at offset {entry['offset']}")
+                for line in _decompress(f.read(length), codec).splitlines():
+                    record = json.loads(line)
+                    if since is not None and record["ts"] < since:
+                        continue
+                    if until is not None and record["ts"] > until:
+                        continue
+                    if kind and record["kind"] != kind:
+                        continue
+                    if policy and _policy_key(record.get("policy") or "") != policy:
+                        continue
+                    if language and record.get("language") != language:
+                        continue
+                    yield record
+
+
+# -------------------------
+# Replay through extraction and scoring
+# -------------------------
+def replay_analyses(reader, user_details, **filters):
+    """
+    Re-run archived analyses through extraction and the scoring functions.
+    Yields (record, policy_data) with affordability/coverage scores for user_details.
+    """
+    from helpers import PolicyRecord, extract_policy_data, calculate_affordability_score, calculate_coverage_score
+
+    for record in reader.records(kind="analyze", **filters):
+        policy_record = PolicyRecord.from_payload(record.get("payload"), record.get("policy") or "Current Policy")
+        policy_data = policy_record.to_policy_data() if policy_record else extract_policy_data(record["response"])
+        calculate_affordability_score(policy_data, user_details)
+        calculate_coverage_score(policy_data, user_details)
+        yield record, policy_data
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    stats = sub.add_parser("stats", help="summarize the archive from its index")
+    stats.add_argument("directory")
+
+    replay = sub.add_parser("replay", help="re-score archived analyses")
+    replay.add_argument("directory")
+    replay.add_argument("--policy")
+    replay.add_argument("--language")
+    replay.add_argument("--since", help="ISO timestamp, e.g. 2025-01-31T00:00")
+    replay.add_argument("--until", help="ISO timestamp")
+    replay.add_argument("--age", type=int, default=30)
+    replay.add_argument("--income-range", default="₹5 Lakh - ₹7.5 Lakh")
+    replay.add_argument("--family-members", type=int, default=4)
+    args = parser.parse_args()
+
+    reader = ArchiveReader(args.directory)
+    if args.command == "stats":
+        chunks = list(reader.chunks())
+        records = sum(c["count"] for c in chunks)
+        raw = sum(c["raw_bytes"] for c in chunks)
+        stored = sum(c["length"] for c in chunks)
+        print(f"{len(chunks)} chunks, {records} records, {raw / 1024:.1f} KB raw -> {stored / 1024:.1f} KB stored"
+              f" ({raw / stored if stored else 0:.1f}x)")
+        return
+
+    user_details = {
+        'age': args.age,
+        'income_range': args.income_range,
+        'family_members': args.family_members
+    }
+    # replay_analyses imports helpers (pandas/plotly) lazily; load it before
+    # starting the clock so the reported throughput excludes import time
+    import helpers  # noqa: F401
+    start = time.perf_counter()
+    count = 0
+    affordability = coverage = 0.0
+    for _, policy_data in replay_analyses(
+        reader, user_details, since=_parse_time(args.since), until=_parse_time(args.until),
+        policy=args.policy, language=args.language
+    ):
+        count += 1
+        affordability += policy_data['affordability_score']
+        coverage += policy_data['coverage_score']
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {count} analyses in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.0f}/s)")
+    if count:
+        print(f"Mean affordability {affordability / count:.1f}, mean coverage adequacy {coverage / count:.1f}")
+
+
+if __name__ == "__main__":
+    main()